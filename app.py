@@ -1,5 +1,4 @@
 import streamlit as st
-import asyncio
 import os
 import logging
 from datetime import datetime
@@ -8,20 +7,39 @@ import io
 # Import our modules
 from app.utils.logging import setup_logging
 from app.utils.env import load_environment_variables
+from app.utils.async_runner import iterate_async
 from app.utils.streamlit_ui import setup_sidebar, display_chat_messages, display_debug_info
 from app.core.mcp_server import MCPServer
 from app.tools.serper_search import SerperSearchTool
-from app.services.chatbot import MCPChatbot
+from app.services.chatbot import MCPChatbot, OpenAIRequestPool
+
+@st.cache_resource
+def make_openai_client(api_key: str):
+    """Share one OpenAI client, and its connection pool, across all sessions"""
+    import openai
+    return openai.AsyncOpenAI(api_key=api_key)
+
+@st.cache_resource
+def make_request_pool(api_key: str) -> OpenAIRequestPool:
+    """Share one OpenAI request pool across all sessions, since rate limits apply per API key"""
+    return OpenAIRequestPool()
+
+@st.cache_resource
+def make_search_tool(api_key: str) -> SerperSearchTool:
+    """Share one Serper search tool, with its HTTP client and result cache, across all sessions"""
+    return SerperSearchTool(api_key)
 
 # Streamlit App
 def main():
     st.set_page_config(page_title="MCP Chatbot", page_icon="🤖", layout="wide")
+    ss = st.session_state
     
     st.title("🤖 MCP Chatbot with OpenAI Intent Detection")
     st.markdown("A smart chatbot using Model Context Protocol (MCP) with OpenAI-powered intent detection and Serper API for web search")
     
-    # Set up logging
-    logger, streamlit_handler = setup_logging()
+    # Set up logging; each session keeps its own log buffer
+    logger, streamlit_handler = setup_logging(ss.get("log_handler"))
+    ss.log_handler = streamlit_handler
     
     # Load environment variables
     env_loaded, env_message = load_environment_variables()
@@ -34,43 +52,42 @@ def main():
     openai_api_key = os.getenv("OPENAI_API_KEY")
     
     # Store API key status in session state for UI
-    st.session_state.serper_api_key_loaded = bool(serper_api_key)
-    st.session_state.openai_api_key_loaded = bool(openai_api_key)
+    ss.serper_api_key_loaded = bool(serper_api_key)
+    ss.openai_api_key_loaded = bool(openai_api_key)
     
     # Sidebar for configuration
-    show_debug, show_logs = setup_sidebar(streamlit_handler)
+    show_debug, show_logs, show_raw = setup_sidebar(streamlit_handler)
     
     # Initialize session state
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    
-    if "mcp_server" not in st.session_state:
-        st.session_state.mcp_server = None
-    
-    if "chatbot" not in st.session_state:
-        st.session_state.chatbot = None
+    ss.setdefault("messages", [])
+    ss.setdefault("mcp_server", None)
+    ss.setdefault("chatbot", None)
     
     # Initialize MCP server and chatbot if API keys are provided
-    if serper_api_key and openai_api_key and st.session_state.mcp_server is None:
+    if serper_api_key and openai_api_key and ss.mcp_server is None:
         try:
             # Initialize MCP server
             mcp_server = MCPServer()
             
             # Register Serper search tool
-            search_tool = SerperSearchTool(serper_api_key)
+            search_tool = make_search_tool(serper_api_key)
             mcp_server.register_tool("search", search_tool)
             
-            # Initialize chatbot
-            chatbot = MCPChatbot(mcp_server)
+            # Initialize chatbot; only its conversation history is per-session
+            chatbot = MCPChatbot(
+                mcp_server,
+                openai_client=make_openai_client(openai_api_key),
+                request_pool=make_request_pool(openai_api_key)
+            )
             
-            st.session_state.mcp_server = mcp_server
-            st.session_state.chatbot = chatbot
+            ss.mcp_server = mcp_server
+            ss.chatbot = chatbot
             
             logger.info("MCP Server initialized with OpenAI intent detection and Serper search tool")
             st.success("✅ MCP Server initialized with OpenAI intent detection and Serper search tool!")
             
         except Exception as e:
-            logger.error(f"Failed to initialize MCP server: {str(e)}")
+            logger.error("Failed to initialize MCP server: %s", e)
             st.error(f"❌ Failed to initialize MCP server: {str(e)}")
     elif not serper_api_key or not openai_api_key:
         logger.warning("Missing API keys: SERPER_API_KEY or OPENAI_API_KEY")
@@ -81,46 +98,47 @@ def main():
     
     # Chat input
     if prompt := st.chat_input("Ask me anything or request a search..."):
+        chatbot = ss.chatbot
         if not serper_api_key or not openai_api_key:
             logger.error("API keys missing, cannot process message")
             st.error("Please set both SERPER_API_KEY and OPENAI_API_KEY environment variables first!")
-            return
-        
-        if st.session_state.chatbot is None:
+        elif chatbot is None:
             logger.error("Chatbot not initialized")
             st.error("Chatbot not initialized. Please check your environment variables.")
-            return
-        
-        # Add user message to chat history
-        logger.info(f"User input: {prompt}")
-        st.session_state.messages.append({"role": "user", "content": prompt})
-        with st.chat_message("user"):
-            st.markdown(prompt)
-        
-        # Generate bot response
-        with st.chat_message("assistant"):
-            with st.spinner("..."):
-                try:
-                    # Process message asynchronously
-                    logger.info("Processing message asynchronously")
-                    response = asyncio.run(
-                        st.session_state.chatbot.process_message(prompt)
-                    )
-                    st.markdown(response)
-                    
-                    # Add assistant response to chat history
-                    st.session_state.messages.append({"role": "assistant", "content": response})
-                    logger.info("Response added to chat history")
-                    
-                    # Show debug info in sidebar if enabled
-                    if show_debug:
-                        display_debug_info()
-                    
-                except Exception as e:
-                    error_msg = f"Sorry, I encountered an error: {str(e)}"
-                    logger.error(f"Error processing message: {str(e)}")
-                    st.error(error_msg)
-                    st.session_state.messages.append({"role": "assistant", "content": error_msg})
+        else:
+            # Add user message to chat history; with fast reruns another run may be
+            # reading the list, so assign a new one instead of mutating it
+            logger.info("User input: %s", prompt)
+            ss.messages = [*ss.messages, {"role": "user", "content": prompt}]
+            with st.chat_message("user"):
+                st.markdown(prompt)
+            
+            # Generate bot response
+            with st.chat_message("assistant"):
+                with st.spinner("..."):
+                    try:
+                        # Process message asynchronously, rendering tokens as they arrive
+                        logger.info("Processing message asynchronously")
+                        response = st.write_stream(
+                            iterate_async(chatbot.process_message(prompt, include_raw_results=show_raw))
+                        )
+                        
+                        # The chatbot runs on the background loop, outside this session's script thread
+                        ss.last_intent = chatbot.last_intent
+                        
+                        # Add assistant response to chat history
+                        ss.messages = [*ss.messages, {"role": "assistant", "content": response}]
+                        logger.info("Response added to chat history")
+                        
+                    except Exception as e:
+                        error_msg = f"Sorry, I encountered an error: {str(e)}"
+                        logger.error("Error processing message: %s", e)
+                        st.error(error_msg)
+                        ss.messages = [*ss.messages, {"role": "assistant", "content": error_msg}]
+    
+    # Show debug info in sidebar if enabled; on every rerun, not just after a new message
+    if show_debug:
+        display_debug_info()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
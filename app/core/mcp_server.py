@@ -20,16 +20,27 @@ class MCPServer:
             for name, tool in self.tools.items()
         ]
     
+    def list_openai_tools(self) -> List[Dict[str, Any]]:
+        """Describe registered tools in OpenAI's function-calling format"""
+        # get_schema() already returns a JSON-Schema function description
+        return [
+            {
+                "type": "function",
+                "function": tool.get_schema()
+            }
+            for tool in self.tools.values()
+        ]
+    
     async def call_tool(self, name: str, **kwargs) -> Dict[str, Any]:
         if name not in self.tools:
-            logger.error(f"Tool '{name}' not found")
+            logger.error("Tool '%s' not found", name)
             return {"error": f"Tool '{name}' not found"}
         
         try:
-            logger.info(f"Calling tool '{name}' with args: {kwargs}")
+            logger.info("Calling tool '%s' with args: %s", name, kwargs)
             result = await self.tools[name].execute(**kwargs)
-            logger.info(f"Tool '{name}' executed successfully")
+            logger.info("Tool '%s' executed successfully", name)
             return {"success": True, "result": result}
         except Exception as e:
-            logger.error(f"Tool '{name}' execution failed: {str(e)}")
+            logger.error("Tool '%s' execution failed: %s", name, e)
             return {"error": f"Tool execution failed: {str(e)}"} 
\ No newline at end of file
@@ -0,0 +1,8 @@
+from typing import Optional
+from pydantic import BaseModel, Field
+
+class IntentResult(BaseModel):
+    """Structured output of the intent detection model"""
+    needs_search: bool = Field(description="True if answering needs a web search")
+    search_query: Optional[str] = Field(description="Optimized search query, or null if no search is needed")
+    reasoning: str = Field(description="Brief explanation of the decision")
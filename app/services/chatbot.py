@@ -1,248 +1,442 @@
-import json
+import asyncio
 import logging
 import os
-from typing import Dict, Any, List
-import openai
+import re
+import time
+from collections import OrderedDict
+from contextlib import aclosing, asynccontextmanager, suppress
+from typing import TYPE_CHECKING, Dict, Any, List, Optional, AsyncIterator, Awaitable, Callable, Tuple
 from app.core.mcp_server import MCPServer
+from app.models.intent import IntentResult
+from app.utils import fast_json
+
+if TYPE_CHECKING:
+    import openai
 
 logger = logging.getLogger("mcp-chatbot")
 
+# Maximum number of intent-detection results remembered per chatbot
+INTENT_CACHE_SIZE = 256
+
+# Conversation turns replayed to OpenAI for conversational replies; intent
+# classification is message-local and gets no history at all
+MAX_HISTORY_TURNS = 8
+
+# OpenAI models: a small, cheap model is enough to classify intent
+INTENT_MODEL = "gpt-4o-mini"
+CHAT_MODEL = "gpt-4.1-mini"
+
+# Client-side limits for OpenAI requests; keep them at or below the account's rate limits
+OPENAI_MAX_CONCURRENCY = 10
+OPENAI_REQUESTS_PER_MINUTE = 500
+OPENAI_TOKENS_PER_MINUTE = 200_000
+
+# System prompts are built once at import rather than on every call
+_INTENT_SYSTEM_PROMPT = """Decide whether the user's message needs a web search for current, factual or specific information.
+Set search_query to an optimized search query, or null when no search is needed.
+Greetings, small talk, opinions and arithmetic need no search."""
+
+_RESPONSE_SYSTEM_PROMPT = """You are a helpful chatbot that can search the web for information.
+When users ask questions that don't require current information, provide friendly, helpful responses.
+Keep responses concise and engaging. If appropriate, suggest they can ask you to search for specific information."""
+
+_SUMMARY_SYSTEM_PROMPT = """You are a helpful AI assistant that summarizes search results.
+Given a user query and search results, provide a concise, informative summary that directly answers the user's question.
+Focus on extracting the most relevant information from the search results.
+Your summary should be 2-3 paragraphs at most, highlighting the key points and insights."""
+
+# Yielded before the summary itself, so on its own it is not an answer
+_SUMMARY_HEADER = "**AI Summary:**\n\n"
+
+# Messages whose intent is obvious enough to skip the intent model. Only unambiguous
+# command forms count: bare "google X" or "search X" may be talking about Google or
+# searching, so those go to the intent model
+_SEARCH_COMMAND_RE = re.compile(
+    r"^(?:please\s+)?(?:search\s+(?:the\s+web\s+)?for\s+|look\s+up\s+(?!(?:at|to|into|from)\b)|google\s*:\s*|google\s+for\s+)"
+    r"(?!(?:it|that|this|them)\b[\s?.!]*$)(?P<query>.+?)[\s?.!]*$",
+    re.IGNORECASE
+)
+# Greetings and acknowledgements only count when they are the whole message, apart
+# from a few fixed tails, so "No news today" or "Hey, weather today" still get classified
+_GREETING_RE = re.compile(
+    r"^(?:(?:hi|hello|hey)(?:\s+there)?|thanks|thank\s+you|bye|goodbye|ok|okay|yes|no)(?:\s+(?:so\s+much|a\s+lot|again))?[\s!.,]*$",
+    re.IGNORECASE
+)
+# At least one operator between operands, so bare numbers like "1984" or a phone
+# number still go to intent detection
+_ARITHMETIC_RE = re.compile(r"^\s*[\d.()]+(?:\s*[-+*/]\s*[\d.()]+)+\s*$")
+
+class OpenAIRequestPool:
+    """Bound concurrent OpenAI requests and pace them under requests- and tokens-per-minute budgets"""
+    
+    def __init__(self, max_concurrency: int = OPENAI_MAX_CONCURRENCY,
+                 requests_per_minute: int = OPENAI_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = OPENAI_TOKENS_PER_MINUTE):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._lock = asyncio.Lock()
+        self._available_requests = float(requests_per_minute)
+        self._available_tokens = float(tokens_per_minute)
+        self._last_refill = time.monotonic()
+    
+    def _estimate_tokens(self, request: Dict[str, Any]) -> int:
+        """Rough token cost of a request: about 4 characters per prompt token plus the completion budget"""
+        prompt_chars = sum(len(message.get("content") or "") for message in request.get("messages", []))
+        return min(prompt_chars // 4 + request.get("max_tokens", 0), self.tokens_per_minute)
+    
+    def _refill(self):
+        now = time.monotonic()
+        elapsed_minutes = (now - self._last_refill) / 60
+        self._last_refill = now
+        self._available_requests = min(self.requests_per_minute, self._available_requests + elapsed_minutes * self.requests_per_minute)
+        self._available_tokens = min(self.tokens_per_minute, self._available_tokens + elapsed_minutes * self.tokens_per_minute)
+    
+    async def _reserve(self, tokens: int):
+        # Waiters queue on the lock, so requests are admitted in arrival order
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._available_requests >= 1 and self._available_tokens >= tokens:
+                    self._available_requests -= 1
+                    self._available_tokens -= tokens
+                    return
+                wait_minutes = max(
+                    (1 - self._available_requests) / self.requests_per_minute,
+                    (tokens - self._available_tokens) / self.tokens_per_minute
+                )
+                logger.info("OpenAI rate budget exhausted, waiting %.2fs", wait_minutes * 60)
+                await asyncio.sleep(wait_minutes * 60)
+    
+    @asynccontextmanager
+    async def slot(self, **request):
+        """Hold a concurrency slot for a request, once the rate budget allows it to start"""
+        await self._reserve(self._estimate_tokens(request))
+        async with self._semaphore:
+            yield
+    
+    async def submit(self, create: Callable[..., Awaitable[Any]], **request) -> Any:
+        """Run a single, non-streaming OpenAI call through the pool"""
+        async with self.slot(**request):
+            return await create(**request)
+
 class MCPChatbot:
-    def __init__(self, mcp_server: MCPServer):
+    def __init__(self, mcp_server: MCPServer, openai_client: Optional["openai.AsyncOpenAI"] = None,
+                 request_pool: Optional[OpenAIRequestPool] = None):
         self.mcp_server = mcp_server
         self.conversation_history = []
-        self.openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.last_intent = None
+        self._intent_cache: OrderedDict[str, Dict[str, Any]] = OrderedDict()
+        if openai_client is None:
+            # Imported here so reruns that never build a chatbot don't pay for the openai import
+            import openai
+            openai_client = openai.AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.openai_client = openai_client
+        self._pool = request_pool or OpenAIRequestPool()
+    
+    def _detect_intent_locally(self, message: str) -> Optional[Dict[str, Any]]:
+        """Classify explicit search commands and obvious chat without calling OpenAI, or return None"""
+        text = message.strip()
+        if match := _SEARCH_COMMAND_RE.match(text):
+            logger.info("Intent detected locally: explicit search command")
+            return {
+                "needs_search": True,
+                "search_query": match.group("query"),
+                "reasoning": "Local prefilter: Explicit search command"
+            }
+        elif _GREETING_RE.match(text):
+            reasoning = "Greeting or pleasantry"
+        elif _ARITHMETIC_RE.match(text):
+            reasoning = "Plain arithmetic"
+        else:
+            return None
+        
+        logger.info("Intent detected locally: %s", reasoning)
+        return {
+            "needs_search": False,
+            "search_query": None,
+            "reasoning": f"Local prefilter: {reasoning}"
+        }
     
     async def _detect_search_intent_with_openai(self, message: str) -> Dict[str, Any]:
         """Use OpenAI to detect if the message requires a search and extract the query"""
-        logger.info(f"Detecting intent for message: '{message[:50]}...' if len(message) > 50 else message")
+        logger.info("Detecting intent for message: '%.50s%s'", message, "..." if len(message) > 50 else "")
+        
+        # Intent detection runs at temperature 0 on the message alone, so the same
+        # message always classifies the same way; case and padding don't matter
+        cache_key = message.strip().lower()
+        cached = self._intent_cache.get(cache_key)
+        if cached is not None:
+            self._intent_cache.move_to_end(cache_key)
+            logger.info("Intent detection cache hit")
+            return cached
         
-        system_prompt = """
-        You are an intent detection system for a chatbot that can search the web.
-
-        Analyze the user's message and determine:
-        1. Whether they need current information, facts, or data that would require a web search
-        2. What the optimal search query should be
-
-        Return a JSON response with:
-        - "needs_search": boolean (true if web search is needed)
-        - "search_query": string (the optimized search query, or null if no search needed)
-        - "reasoning": string (brief explanation of your decision)
-
-        Examples:
-        - "What time/date is it?" → needs_search: true, search_query: "current datetime"
-        - "What's the weather like?" → needs_search: true, search_query: "current weather"
-        - "Hello, how are you?" → needs_search: false, search_query: null
-        - "Tell me about quantum computing" → needs_search: true, search_query: "quantum computing latest developments"
-        - "What's 2+2?" → needs_search: false, search_query: null
-        - "Latest news about AI" → needs_search: true, search_query: "latest AI news 2024"
-        - "How to make coffee" → needs_search: true, search_query: "how to make coffee step by step"
-
-        Focus on detecting when users need current, factual, or specific information that would benefit from a web search.
-        """
-
         try:
             logger.info("Calling OpenAI API for intent detection")
             
-            # Create messages array with conversation history
-            messages = [{"role": "system", "content": system_prompt}]
-            
-            # Add conversation history (excluding the current message which will be added separately)
-            for msg in self.conversation_history[:-1]:  # Exclude the last message which is the current user message
-                messages.append(msg)
-                
-            # Add the current user message
-            messages.append({"role": "user", "content": message})
+            # Classify the current user message on its own
+            messages = [
+                {"role": "system", "content": _INTENT_SYSTEM_PROMPT},
+                {"role": "user", "content": message}
+            ]
             
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini",
+            # Structured outputs make the SDK validate the reply against IntentResult,
+            # so there is no free-text JSON to parse
+            response = await self._pool.submit(
+                self.openai_client.beta.chat.completions.parse,
+                model=INTENT_MODEL,
                 messages=messages,
+                response_format=IntentResult,
                 temperature=0.0,
                 max_tokens=500
             )
             
-            # Parse the JSON response
-            content = response.choices[0].message.content.strip()
-            logger.debug(f"OpenAI response: {content}")
-            try:
-                # Try to parse as JSON
-                result = json.loads(content)
-                logger.info(f"Intent detected: needs_search={result.get('needs_search', False)}, query='{result.get('search_query')}'")
-                return result
-            except json.JSONDecodeError:
-                # Fallback if JSON parsing fails
-                logger.warning(f"Failed to parse OpenAI response as JSON: {content}")
+            parsed = response.choices[0].message.parsed
+            if parsed is None:
+                # The model refused to answer
+                logger.warning("Intent detection refused: %s", response.choices[0].message.refusal)
                 return {
                     "needs_search": False,
                     "search_query": None,
-                    "reasoning": "Failed to parse OpenAI response as JSON"
+                    "reasoning": "Intent detection was refused by OpenAI"
                 }
+            
+            result = parsed.model_dump()
+            logger.info("Intent detected: needs_search=%s, query='%s'", result["needs_search"], result["search_query"])
+            self._intent_cache[cache_key] = result
+            if len(self._intent_cache) > INTENT_CACHE_SIZE:
+                self._intent_cache.popitem(last=False)
+            return result
                 
         except Exception as e:
             # Return a default response if OpenAI API fails
-            logger.error(f"OpenAI API error: {str(e)}")
+            logger.error("OpenAI API error: %s", e)
             return {
                 "needs_search": False,
                 "search_query": None,
                 "reasoning": f"OpenAI API error: {str(e)}"
             }
     
-    async def process_message(self, message: str) -> str:
-        """Process user message and return response"""
-        logger.info(f"Processing user message: '{message[:50]}...' if len(message) > 50 else message")
-        self.conversation_history.append({"role": "user", "content": message})
-        
-        # Use OpenAI to detect intent and extract search query
-        intent_result = await self._detect_search_intent_with_openai(message)
-        
-        # Store intent result for debugging
-        if hasattr(st := __import__('streamlit', fromlist=['session_state']), 'session_state'):
-            st.session_state.last_intent = intent_result
+    async def process_message(self, message: str, include_raw_results: bool = False) -> AsyncIterator[str]:
+        """Process user message and stream the response"""
+        logger.info("Processing user message: '%.50s%s'", message, "..." if len(message) > 50 else "")
+        user_turn = {"role": "user", "content": message}
+        self.conversation_history.append(user_turn)
         
-        if intent_result.get("needs_search", False):
-            search_query = intent_result.get("search_query", message)
-            logger.info(f"Executing search with query: '{search_query}'")
+        # Record whatever reached the user, even if the stream is closed early
+        # (e.g. by a rerun), so history never ends with an unanswered user turn
+        chunks = []
+        try:
+            # Explicit search commands and obvious chat are classified without OpenAI
+            intent_result = self._detect_intent_locally(message)
             
-            # Call search tool
-            result = await self.mcp_server.call_tool("search", query=search_query)
+            # Start the conversational reply speculatively so the chat path costs a
+            # single OpenAI round-trip; it is dropped if a search turns out to be needed
+            response_stream = None
+            if intent_result is None or not intent_result["needs_search"]:
+                response_stream = self._generate_openai_response(message)
+                first_chunk = asyncio.ensure_future(anext(response_stream, ""))
             
-            if result.get("success"):
-                search_data = result["result"]
-                logger.info("Search successful, formatting response")
-                
-                # Format raw search results
-                raw_response = self._format_search_response(search_data)
+            # Use OpenAI to detect intent and extract search query
+            if intent_result is None:
+                try:
+                    intent_result = await self._detect_search_intent_with_openai(message)
+                except BaseException:
+                    # Don't leave the speculative stream running if this turn is abandoned
+                    if response_stream is not None:
+                        await self._discard_stream(first_chunk, response_stream)
+                    raise
+            
+            # Store intent result for debugging
+            self.last_intent = intent_result
+            
+            if intent_result.get("needs_search", False):
+                if response_stream is not None:
+                    await self._discard_stream(first_chunk, response_stream)
+                search_query = intent_result.get("search_query", message)
+                logger.info("Executing search with query: '%s'", search_query)
                 
-                # Get AI summary of search results
-                summary = await self._summarize_search_results(search_data, message)
+                # Call search tool
+                result = await self.mcp_server.call_tool("search", query=search_query)
                 
-                # Combine summary with raw results
-                response = f"{summary}\n\n**Raw Search Results:**\n\n{raw_response}"
+                if result.get("success"):
+                    search_data = result["result"]
+                    organic_results, knowledge_graph = self._extract_simplified_results(search_data)
+                    simplified_results = [*organic_results, knowledge_graph] if knowledge_graph else organic_results
+                    logger.info("Search successful, summarizing response")
+                    
+                    # Open the summary stream first so its round-trip overlaps
+                    # rendering the header and formatting the raw results
+                    summary = self._summarize_search_results(simplified_results, message, search_query, include_raw_results)
+                    first_summary_chunk = asyncio.ensure_future(anext(summary, ""))
+                    try:
+                        chunks.append(_SUMMARY_HEADER)
+                        yield chunks[-1]
+                        
+                        # Raw results are only built when shown, keeping them out of later prompts
+                        raw_response = self._format_search_response(search_data, organic_results, knowledge_graph) if include_raw_results else None
+                        
+                        # Stream AI summary of search results
+                        chunks.append(await first_summary_chunk)
+                        yield chunks[-1]
+                        async for content in summary:
+                            chunks.append(content)
+                            yield content
+                    finally:
+                        await self._discard_stream(first_summary_chunk, summary)
+                    
+                    if raw_response is not None:
+                        chunks.append(f"\n\n**Raw Search Results:**\n\n{raw_response}")
+                        yield chunks[-1]
+                else:
+                    error = result.get('error', 'Unknown error')
+                    logger.error("Search failed: %s", error)
+                    chunks.append(f"Sorry, I couldn't search for that. Error: {error}")
+                    yield chunks[-1]
             else:
-                error = result.get('error', 'Unknown error')
-                logger.error(f"Search failed: {error}")
-                response = f"Sorry, I couldn't search for that. Error: {error}"
-        else:
-            # Generate conversational response using OpenAI
-            logger.info("Generating conversational response with OpenAI")
-            response = await self._generate_openai_response(message)
-        
-        self.conversation_history.append({"role": "assistant", "content": response})
-        return response
+                # Continue the conversational response already in flight
+                logger.info("Streaming conversational response from OpenAI")
+                async with aclosing(response_stream):
+                    chunks.append(await first_chunk)
+                    yield chunks[-1]
+                    async for content in response_stream:
+                        chunks.append(content)
+                        yield content
+        finally:
+            response = "".join(chunks)
+            if response and response != _SUMMARY_HEADER:
+                self.conversation_history.append({"role": "assistant", "content": response})
+            else:
+                # Nothing was answered, at most the summary header; drop the user turn rather than leave it dangling
+                self.conversation_history = [turn for turn in self.conversation_history if turn is not user_turn]
+    
+    async def _discard_stream(self, first_chunk: asyncio.Future, stream: AsyncIterator[str]):
+        """Cancel a response stream that may still be in flight and release its connection"""
+        first_chunk.cancel()
+        with suppress(asyncio.CancelledError):
+            await first_chunk
+        await stream.aclose()
     
-    async def _generate_openai_response(self, message: str) -> str:
-        """Generate a conversational response using OpenAI"""
+    async def _stream_completion(self, **kwargs) -> AsyncIterator[str]:
+        """Stream the text deltas of an OpenAI chat completion"""
+        # The pool slot is held until the stream is finished or closed
+        async with self._pool.slot(**kwargs):
+            stream = await self.openai_client.chat.completions.create(stream=True, **kwargs)
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+    
+    async def _generate_openai_response(self, message: str) -> AsyncIterator[str]:
+        """Stream a conversational response using OpenAI"""
         try:
             logger.info("Generating response with OpenAI")
-            system_prompt = """
-                You are a helpful chatbot that can search the web for information. 
-                When users ask questions that don't require current information, provide friendly, helpful responses.
-                Keep responses concise and engaging. If appropriate, suggest they can ask you to search for specific information.
-                """
-
             # Create messages array with conversation history
-            messages = [{"role": "system", "content": system_prompt}]
+            messages = [{"role": "system", "content": _RESPONSE_SYSTEM_PROMPT}]
             
-            # Add conversation history (excluding the current message which will be added separately)
-            for msg in self.conversation_history[:-1]:  # Exclude the last message which is the current user message
-                messages.append(msg)
+            # Add the last few turns of conversation history (excluding the current message which will be added separately)
+            messages.extend(self.conversation_history[-(MAX_HISTORY_TURNS * 2 + 1):-1])
                 
             # Add the current user message
             messages.append({"role": "user", "content": message})
             
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini",
+            async with aclosing(self._stream_completion(
+                model=CHAT_MODEL,
                 messages=messages,
                 temperature=0.3,
                 max_tokens=400
-            )
-            
-            content = response.choices[0].message.content.strip()
-            logger.debug(f"OpenAI response: {content[:100]}...")
-            return content
+            )) as stream:
+                async for content in stream:
+                    yield content
+            logger.debug("OpenAI response streamed")
             
         except Exception as e:
-            logger.error(f"Error generating OpenAI response: {str(e)}")
-            return f"I'm having trouble connecting to my AI services. Please try again in a moment. Error: {str(e)}"
+            logger.error("Error generating OpenAI response: %s", e)
+            yield f"I'm having trouble connecting to my AI services. Please try again in a moment. Error: {str(e)}"
+    
+    def _extract_simplified_results(self, search_data: Dict[str, Any]) -> Tuple[List[Dict[str, str]], Optional[Dict[str, str]]]:
+        """Pick the top organic results and the knowledge graph answer, if any, out of a Serper response"""
+        organic_results = []
+        for result in search_data.get("organic", [])[:5]:
+            organic_results.append({
+                "title": result.get("title", "No title"),
+                "snippet": result.get("snippet", "No description"),
+                "link": result.get("link", "")
+            })
+        
+        knowledge_graph = None
+        kg = search_data.get("knowledgeGraph", {})
+        if "description" in kg:
+            knowledge_graph = {
+                "title": kg.get("title", "Knowledge Graph"),
+                "snippet": kg["description"],
+                "link": kg.get("link", "")
+            }
+        
+        return organic_results, knowledge_graph
     
-    def _format_search_response(self, search_data: Dict[str, Any]) -> str:
+    def _format_search_response(self, search_data: Dict[str, Any], organic_results: List[Dict[str, str]],
+                                knowledge_graph: Optional[Dict[str, str]]) -> str:
         """Format search results into a readable response"""
         if "error" in search_data:
             return f"Search error: {search_data['error']}"
         
-        response = "Here's what I found:\n\n"
-        
-        if "organic" in search_data:
-            for i, result in enumerate(search_data["organic"][:5], 1):
-                title = result.get("title", "No title")
-                snippet = result.get("snippet", "No description")
-                link = result.get("link", "")
-                
-                response += f"**{i}. {title}**\n"
-                response += f"{snippet}\n"
-                response += f"🔗 {link}\n\n"
+        parts = ["Here's what I found:\n\n"]
+        for i, result in enumerate(organic_results, 1):
+            parts.append(f"**{i}. {result['title']}**\n{result['snippet']}\n")
+            if result["link"]:
+                parts.append(f"🔗 {result['link']}\n")
+            parts.append("\n")
         
-        if "knowledgeGraph" in search_data:
-            kg = search_data["knowledgeGraph"]
-            if "description" in kg:
-                response += f"**Quick Answer:** {kg['description']}\n\n"
+        if knowledge_graph is not None:
+            parts.append(f"**Quick Answer:** {knowledge_graph['snippet']}\n\n")
         
-        return response
+        return "".join(parts)
     
-    async def _summarize_search_results(self, search_data: Dict[str, Any], user_query: str) -> str:
-        """Summarize search results using OpenAI"""
+    async def _summarize_search_results(self, simplified_results: List[Dict[str, str]], user_query: str, search_query: str,
+                                        include_raw_results: bool = False) -> AsyncIterator[str]:
+        """Stream a summary of search results using OpenAI"""
         try:
             logger.info("Summarizing search results with OpenAI")
             
-            # Create a simplified version of search results for the prompt
-            simplified_results = []
-            
-            if "organic" in search_data:
-                for i, result in enumerate(search_data["organic"][:5], 1):
-                    title = result.get("title", "No title")
-                    snippet = result.get("snippet", "No description")
-                    link = result.get("link", "")
-                    
-                    simplified_results.append({
-                        "title": title,
-                        "snippet": snippet,
-                        "link": link
-                    })
-            
-            if "knowledgeGraph" in search_data:
-                kg = search_data["knowledgeGraph"]
-                if "description" in kg:
-                    simplified_results.append({
-                        "title": kg.get("title", "Knowledge Graph"),
-                        "snippet": kg["description"],
-                        "link": kg.get("link", "")
-                    })
-            
-            system_prompt = """
-            You are a helpful AI assistant that summarizes search results.
-            Given a user query and search results, provide a concise, informative summary that directly answers the user's question.
-            Focus on extracting the most relevant information from the search results.
-            Your summary should be 2-3 paragraphs at most, highlighting the key points and insights.
-            """
-
-            search_results_text = json.dumps(simplified_results, indent=2)
+            search_results_text = fast_json.dumps(simplified_results)
             
+            # Replay the search as a completed tool call so a single follow-up
+            # completion both summarizes the results and answers the user
+            tool_call_id = "call_search"
             messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": f"Query: {user_query}\n\nSearch Results: {search_results_text}\n\nPlease provide a concise summary of these search results that answers my query."}
+                {"role": "system", "content": _SUMMARY_SYSTEM_PROMPT},
+                {"role": "user", "content": user_query},
+                {
+                    "role": "assistant",
+                    "content": None,
+                    "tool_calls": [{
+                        "id": tool_call_id,
+                        "type": "function",
+                        "function": {
+                            "name": "search",
+                            "arguments": fast_json.dumps({"query": search_query})
+                        }
+                    }]
+                },
+                {"role": "tool", "tool_call_id": tool_call_id, "content": search_results_text}
             ]
             
-            response = await self.openai_client.chat.completions.create(
-                model="gpt-4.1-mini",
+            async with aclosing(self._stream_completion(
+                model=CHAT_MODEL,
                 messages=messages,
+                tools=self.mcp_server.list_openai_tools(),
+                tool_choice="none",
                 temperature=0.3,
                 max_tokens=300
-            )
-            
-            summary = response.choices[0].message.content.strip()
+            )) as stream:
+                async for content in stream:
+                    yield content
             logger.info("Search results summarized successfully")
-            return f"**AI Summary:**\n\n{summary}"
             
         except Exception as e:
-            logger.error(f"Error summarizing search results: {str(e)}")
-            return "I found some search results but couldn't generate a summary. Please see the raw results below." 
\ No newline at end of file
+            logger.error("Error summarizing search results: %s", e)
+            if include_raw_results:
+                yield "I found some search results but couldn't generate a summary. Please see the raw results below."
+            else:
+                yield "I found some search results but couldn't generate a summary. Turn on \"Show Raw Search Results\" in the sidebar to see them."
\ No newline at end of file
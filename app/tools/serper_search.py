@@ -1,23 +1,96 @@
-import httpx
+import asyncio
 import logging
-from typing import Dict, Any
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Dict, Any, Optional, Tuple
 from app.core.mcp_tool import MCPTool
+from app.utils import fast_json
+
+if TYPE_CHECKING:
+    import httpx
 
 logger = logging.getLogger("mcp-chatbot")
 
+# Search results are reused for this many seconds, for at most this many queries
+SEARCH_CACHE_TTL = 300
+SEARCH_CACHE_SIZE = 128
+
 class SerperSearchTool(MCPTool):
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.base_url = "https://google.serper.dev/search"
+        self._client = None
+        self._client_loop = None
+        self._cache: OrderedDict[Tuple[str, int], Tuple[float, Dict[str, Any]]] = OrderedDict()
+        self._locks: Dict[Tuple[str, int], asyncio.Lock] = {}
+        # Callers holding or waiting on each lock; a lock is dropped once this reaches 0
+        self._lock_users: Dict[Tuple[str, int], int] = {}
+    
+    def _get_client(self) -> "httpx.AsyncClient":
+        """Return the shared HTTP client, creating it on first use in the running event loop"""
+        # A client's connection pool is bound to the loop it was created on,
+        # so only rebuild it when the caller has moved to a new loop
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            # Imported on first search to keep httpx off the app's cold-start path
+            import httpx
+            self._client = httpx.AsyncClient(
+                timeout=10.0,
+                headers={
+                    "X-API-KEY": self.api_key,
+                    "Content-Type": "application/json"
+                }
+            )
+            self._client_loop = loop
+        return self._client
+    
+    def _get_cached(self, key: Tuple[str, int]) -> Optional[Dict[str, Any]]:
+        """Return a cached search result that is still fresh, or None"""
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        
+        fetched_at, result = entry
+        if time.monotonic() - fetched_at >= SEARCH_CACHE_TTL:
+            del self._cache[key]
+            return None
+        
+        self._cache.move_to_end(key)
+        return result
     
     async def execute(self, query: str, num_results: int = 5) -> Dict[str, Any]:
-        """Execute a search using Serper API"""
-        logger.info(f"Executing search with query: '{query}', num_results: {num_results}")
-        headers = {
-            "X-API-KEY": self.api_key,
-            "Content-Type": "application/json"
-        }
+        """Execute a search using Serper API, reusing recent results for the same query"""
+        key = (query, num_results)
+        cached = self._get_cached(key)
+        if cached is not None:
+            logger.info("Search cache hit for query: '%s'", query)
+            return cached
         
+        # Concurrent identical searches wait for the first one instead of each calling Serper
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._lock_users[key] = self._lock_users.get(key, 0) + 1
+        try:
+            async with lock:
+                cached = self._get_cached(key)
+                if cached is not None:
+                    logger.info("Search cache hit for query: '%s'", query)
+                    return cached
+                
+                result = await self._search(query, num_results)
+                if "error" not in result:
+                    self._cache[key] = (time.monotonic(), result)
+                    if len(self._cache) > SEARCH_CACHE_SIZE:
+                        self._cache.popitem(last=False)
+                return result
+        finally:
+            self._lock_users[key] -= 1
+            if not self._lock_users[key]:
+                del self._lock_users[key]
+                del self._locks[key]
+    
+    async def _search(self, query: str, num_results: int) -> Dict[str, Any]:
+        """Send a search request to the Serper API"""
+        logger.info("Executing search with query: '%s', num_results: %d", query, num_results)
         payload = {
             "q": query,
             "num": num_results
@@ -25,18 +98,13 @@ class SerperSearchTool(MCPTool):
         
         try:
             logger.info("Sending request to Serper API")
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.base_url,
-                    headers=headers,
-                    json=payload,
-                    timeout=10.0
-                )
-                response.raise_for_status()
-                logger.info(f"Serper API response received, status code: {response.status_code}")
-                return response.json()
+            client = self._get_client()
+            response = await client.post(self.base_url, json=payload)
+            response.raise_for_status()
+            logger.info("Serper API response received, status code: %d", response.status_code)
+            return fast_json.loads(response.content)
         except Exception as e:
-            logger.error(f"Serper API search failed: {str(e)}")
+            logger.error("Serper API search failed: %s", e)
             return {"error": f"Search failed: {str(e)}"}
     
     def get_schema(self) -> Dict[str, Any]:
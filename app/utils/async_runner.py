@@ -0,0 +1,35 @@
+import asyncio
+import threading
+from typing import AsyncGenerator, Iterator, TypeVar
+import streamlit as st
+
+# uvloop is an optional, faster drop-in event loop; it is not available on Windows
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+T = TypeVar("T")
+
+_DONE = object()
+
+@st.cache_resource
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """Return the process-wide event loop, running forever on a daemon thread"""
+    # A single long-lived loop keeps the OpenAI and Serper connection pools warm
+    # across messages, reruns and sessions
+    loop = uvloop.new_event_loop() if uvloop is not None else asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="mcp-event-loop", daemon=True).start()
+    return loop
+
+async def _next(async_generator: AsyncGenerator[T, None]):
+    return await anext(async_generator, _DONE)
+
+def iterate_async(async_generator: AsyncGenerator[T, None]) -> Iterator[T]:
+    """Drive an async generator on the background event loop from synchronous code, e.g. to feed st.write_stream"""
+    loop = get_event_loop()
+    try:
+        while (item := asyncio.run_coroutine_threadsafe(_next(async_generator), loop).result()) is not _DONE:
+            yield item
+    finally:
+        asyncio.run_coroutine_threadsafe(async_generator.aclose(), loop).result()
@@ -1,25 +1,65 @@
 import logging
+import os
+from collections import deque
+from contextvars import ContextVar
 from datetime import datetime
+from itertools import islice
+from typing import Optional
 
-# Custom log handler for Streamlit
+# Custom log handler for Streamlit; each session owns one, so no session can read
+# another's prompts and search queries
 class StreamlitLogHandler(logging.Handler):
     def __init__(self):
         super().__init__()
-        self.logs = []
+        # Keep only the most recent logs; deque evicts the oldest in O(1)
+        self.logs = deque(maxlen=int(os.getenv("LOG_BUFFER_SIZE", "10000")))
+        # Joined log text, its encoding and the last tail requested as (size, text),
+        # rebuilt only after new records arrive
+        self._text = None
+        self._bytes = None
+        self._tail = None
         
     def emit(self, record):
-        log_entry = self.format(record)
-        self.logs.append({
-            'timestamp': datetime.now().strftime('%H:%M:%S'),
-            'level': record.levelname,
-            'message': record.getMessage()
-        })
-        # Keep only the last 100 logs
-        if len(self.logs) > 100:
-            self.logs.pop(0)
+        # Format once here; the sidebar re-renders these on every rerun
+        timestamp = datetime.now().strftime('%H:%M:%S')
+        self.logs.append(f"{timestamp} - {record.levelname}: {record.getMessage()}")
+        self._text = None
+        self._bytes = None
+        self._tail = None
+    
+    def get_text(self, last: Optional[int] = None) -> str:
+        """Return the buffered logs, or only the last few, as one newline-separated string"""
+        # Records are emitted from the event loop thread, so join under the handler lock
+        with self.lock:
+            if last is not None and last < len(self.logs):
+                if self._tail is None or self._tail[0] != last:
+                    self._tail = (last, "\n".join(islice(self.logs, len(self.logs) - last, None)))
+                return self._tail[1]
+            if self._text is None:
+                self._text = "\n".join(self.logs)
+            return self._text
+    
+    def get_bytes(self) -> bytes:
+        """Return get_text() encoded as UTF-8, e.g. for a download button"""
+        with self.lock:
+            if self._bytes is None:
+                self._bytes = self.get_text().encode()
+            return self._bytes
 
-def setup_logging():
-    """Configure logging for the application"""
+# The log handler of the session whose work is running. Set on the script thread;
+# the background event loop copies it into every task that thread schedules
+_session_handler: ContextVar[Optional[StreamlitLogHandler]] = ContextVar("session_log_handler", default=None)
+
+class _SessionLogRouter(logging.Handler):
+    """Forward each record to the log handler of the session that produced it"""
+    
+    def emit(self, record):
+        handler = _session_handler.get()
+        if handler is not None:
+            handler.handle(record)
+
+def setup_logging(streamlit_handler: Optional[StreamlitLogHandler] = None):
+    """Configure logging for the application and route this session's records to its handler"""
     logging.basicConfig(
         level=logging.INFO,
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
@@ -29,9 +69,13 @@ def setup_logging():
     )
     logger = logging.getLogger("mcp-chatbot")
     
-    # Add Streamlit log handler
-    streamlit_handler = StreamlitLogHandler()
-    streamlit_handler.setFormatter(logging.Formatter('%(levelname)s: %(message)s'))
-    logger.addHandler(streamlit_handler)
+    # Streamlit reruns this on every interaction; attach the router only once
+    if not any(isinstance(handler, _SessionLogRouter) for handler in logger.handlers):
+        logger.addHandler(_SessionLogRouter())
+    
+    # Pass the session's existing handler back in so its logs survive reruns
+    if streamlit_handler is None:
+        streamlit_handler = StreamlitLogHandler()
+    _session_handler.set(streamlit_handler)
     
-    return logger, streamlit_handler 
\ No newline at end of file
+    return logger, streamlit_handler
\ No newline at end of file
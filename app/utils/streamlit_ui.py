@@ -1,16 +1,45 @@
 import streamlit as st
+import json
 from datetime import datetime
 import io
 from app.utils.logging import StreamlitLogHandler
 
-def setup_sidebar(streamlit_handler: StreamlitLogHandler, show_logs: bool = True, show_debug: bool = False):
+# Number of chat messages rendered at first, and added by each "Load older" click
+CHAT_WINDOW_SIZE = 50
+
+# Number of most recent log lines shown in the sidebar viewer
+LOG_VIEW_SIZE = 500
+
+# strftime format for the downloaded log file name
+_LOG_FILE_NAME_FORMAT = "mcp_chatbot_logs_%Y%m%d_%H%M%S.txt"
+
+# Static sidebar text, built once rather than on every rerun
+_ABOUT_MD = """
+This chatbot uses:
+- **OpenAI GPT-4o-mini** for intelligent intent detection and **GPT-4.1-mini** for replies
+- **MCP (Model Context Protocol)** for tool integration
+- **Serper API** for web search
+- **Streamlit** for the frontend
+
+The AI intelligently determines when to search vs. when to chat conversationally.
+
+Try asking:
+- "What's the weather like today?"
+- "Hello, how are you?"
+- "Tell me about quantum computing"
+- "What's 2+2?"
+- "Latest news about AI"
+"""
+
+def setup_sidebar(streamlit_handler: StreamlitLogHandler, show_logs: bool = False, show_debug: bool = False, show_raw: bool = False):
     """Set up the sidebar with configuration options"""
+    ss = st.session_state
     with st.sidebar:
         st.header("Configuration")
         
         # Display API key status
-        serper_api_key = st.session_state.get("serper_api_key_loaded", False)
-        openai_api_key = st.session_state.get("openai_api_key_loaded", False)
+        serper_api_key = ss.get("serper_api_key_loaded", False)
+        openai_api_key = ss.get("openai_api_key_loaded", False)
         
         if serper_api_key:
             st.success("✅ Serper API Key loaded from environment")
@@ -25,76 +54,73 @@ def setup_sidebar(streamlit_handler: StreamlitLogHandler, show_logs: bool = True
             st.info("Please set the OPENAI_API_KEY environment variable")
         
         if st.button("Clear Chat History"):
-            st.session_state.messages = []
+            ss.messages = []
+            ss.chat_window = CHAT_WINDOW_SIZE
             st.rerun()
         
         # Debug toggle
         show_debug = st.checkbox("Show Debug Info", value=show_debug)
         
+        # Raw search results toggle
+        show_raw = st.checkbox("Show Raw Search Results", value=show_raw)
+        
         # Log viewer toggle
         show_logs = st.checkbox("Show Logs", value=show_logs)
         
         st.markdown("---")
         st.markdown("### About")
-        st.markdown("""
-        This chatbot uses:
-        - **OpenAI GPT-4.1-mini** for intelligent intent detection
-        - **MCP (Model Context Protocol)** for tool integration
-        - **Serper API** for web search
-        - **Streamlit** for the frontend
+        st.markdown(_ABOUT_MD)
         
-        The AI intelligently determines when to search vs. when to chat conversationally.
-        
-        Try asking:
-        - "What's the weather like today?"
-        - "Hello, how are you?"
-        - "Tell me about quantum computing"
-        - "What's 2+2?"
-        - "Latest news about AI"
-        """)
-        
-        # Display logs if enabled
+        # Display logs if enabled; the checkbox doubles as the expander's open state,
+        # so nothing below runs while the logs are hidden
         if show_logs and streamlit_handler:
             st.markdown("---")
-            st.markdown("### Logs")
-            
-            # Add download logs button
-            if streamlit_handler.logs:
-                log_text = "\n".join([f"{log['timestamp']} - {log['level']}: {log['message']}" for log in streamlit_handler.logs])
-                log_bytes = log_text.encode()
-                st.download_button(
-                    label="Download Logs",
-                    data=log_bytes,
-                    file_name=f"mcp_chatbot_logs_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt",
-                    mime="text/plain"
-                )
-            
-            log_container = st.container()
-            with log_container:
-                for log in streamlit_handler.logs:
-                    level = log['level']
-                    if level == 'ERROR':
-                        st.error(f"{log['timestamp']} - {log['message']}")
-                    elif level == 'WARNING':
-                        st.warning(f"{log['timestamp']} - {log['message']}")
-                    elif level == 'INFO':
-                        st.info(f"{log['timestamp']} - {log['message']}")
-                    else:
-                        st.text(f"{log['timestamp']} - {level}: {log['message']}")
+            with st.expander("Logs", expanded=True):
+                if streamlit_handler.logs:
+                    # Add download logs button
+                    st.download_button(
+                        label="Download Logs",
+                        data=streamlit_handler.get_bytes(),
+                        file_name=datetime.now().strftime(_LOG_FILE_NAME_FORMAT),
+                        mime="text/plain"
+                    )
+                    
+                    # One element for the latest logs instead of one per entry;
+                    # the download has the full buffer
+                    st.code(streamlit_handler.get_text(last=LOG_VIEW_SIZE), language="log")
     
-    return show_debug, show_logs
+    return show_debug, show_logs, show_raw
+
+def _load_older_messages():
+    st.session_state.chat_window += CHAT_WINDOW_SIZE
 
 def display_chat_messages():
-    """Display chat messages from session state"""
-    for message in st.session_state.messages:
+    """Display the most recent chat messages from session state"""
+    ss = st.session_state
+    messages = ss.messages
+    window = ss.setdefault("chat_window", CHAT_WINDOW_SIZE)
+    
+    # Older messages stay out of the page until asked for
+    if len(messages) > window:
+        st.button(f"Load older messages ({len(messages) - window} hidden)", on_click=_load_older_messages)
+    
+    for message in messages[-window:]:
         with st.chat_message(message["role"]):
             st.markdown(message["content"])
 
 def display_debug_info():
     """Display debug information in the sidebar"""
-    if "last_intent" in st.session_state:
+    ss = st.session_state
+    intent = ss.get("last_intent")
+    if intent is not None:
+        # Serialize each intent once; keeping the dict in the cache means the
+        # identity check can't be fooled by a recycled id
+        cached = ss.get("intent_json_cache")
+        if cached is None or cached[0] is not intent:
+            cached = (intent, json.dumps(intent, indent=2, sort_keys=True))
+            ss.intent_json_cache = cached
+        
         with st.sidebar:
             st.markdown("---")
             st.markdown("### Debug Info")
-            intent = st.session_state.last_intent
-            st.json(intent) 
\ No newline at end of file
+            st.code(cached[1], language="json") 
\ No newline at end of file